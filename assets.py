@@ -6,25 +6,51 @@ Returns simple lists of file paths to be picked by effects.
 """
 
 import os
+import stat as stat_module
 
 IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
 AUDIO_EXTS = (".mp3", ".wav", ".aac", ".m4a", ".ogg")
 VIDEO_EXTS = (".mp4", ".mov", ".mkv", ".webm", ".avi")
 
+# Merged once at import: set membership is O(1) vs a linear tuple scan.
+ALL_EXTS = frozenset(IMAGE_EXTS + AUDIO_EXTS + VIDEO_EXTS)
+
+# dirpath -> (st_mtime_ns, files). The GUI rescans every asset folder on
+# each preview/generate; an unchanged folder costs one stat instead of a
+# full directory walk.
+_SCAN_CACHE = {}
+_SCAN_CACHE_MAX = 64
+
 def gather_assets(dirpath):
     """
     Return a list of file paths inside dirpath. Walks top-level only.
     """
     if not dirpath:
         return []
-    if not os.path.isdir(dirpath):
+    try:
+        st = os.stat(dirpath)
+    except OSError:
+        return []
+    if not stat_module.S_ISDIR(st.st_mode):
         return []
+    cached = _SCAN_CACHE.get(dirpath)
+    if cached is not None and cached[0] == st.st_mtime_ns:
+        return cached[1]
     files = []
-    for entry in os.listdir(dirpath):
-        full = os.path.join(dirpath, entry)
-        if not os.path.isfile(full):
-            continue
-        ext = os.path.splitext(entry)[1].lower()
-        if ext in IMAGE_EXTS + AUDIO_EXTS + VIDEO_EXTS:
-            files.append(full)
-    return sorted(files)
\ No newline at end of file
+    # scandir reuses the stat info the OS already handed back with the
+    # directory listing, so we avoid one stat syscall per entry.
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            name = entry.name
+            dot = name.rfind(".")
+            if dot < 0:
+                continue
+            if name[dot:].lower() in ALL_EXTS:
+                files.append(entry.path)
+    files.sort()
+    if len(_SCAN_CACHE) >= _SCAN_CACHE_MAX:
+        _SCAN_CACHE.clear()
+    _SCAN_CACHE[dirpath] = (st.st_mtime_ns, files)
+    return files
\ No newline at end of file
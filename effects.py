@@ -14,6 +14,9 @@ Each returned filter fragment uses placeholders:
 {0v}/{0a} => main source ([0:v]/[0:a])
 {1v}/{1a}, {2v}/{2a}, ... => first/second/... extra inputs provided by that effect.
 ffmpeg_worker will map placeholders to the proper global input indices.
+
+Builders live in the _EFFECT_BUILDERS dispatch table; build_effect_command_for
+is a dict lookup rather than a linear if/elif chain over every known key.
 """
 
 import os
@@ -47,328 +50,368 @@ EFFECTS_METADATA = {
     "overlay_videos": {"name": "Overlay Short Videos", "default_level": 1.0, "max_level": 5.0},
 }
 
-def _choose_asset(list_assets):
+# Shared no-op result for effects that have nothing to do (missing assets,
+# placeholder effects, unknown keys). Built once; tuples keep it immutable so
+# callers cannot accidentally mutate the shared instance.
+_PASSTHROUGH = {"inputs": (), "filters": ("{0v}copy[vout]", "{0a}anull[aout]")}
+
+
+class AssetCycler:
+    """
+    Shuffled round-robin over one asset category. Shuffling once up front
+    makes every draw O(1) and spreads picks evenly over the library, instead
+    of rng.choice re-sampling (and possibly repeating) on each call.
+    """
+
+    def __init__(self, files, rng=random):
+        self._files = list(files)
+        rng.shuffle(self._files)
+        self._pos = 0
+
+    def __bool__(self):
+        return bool(self._files)
+
+    def next(self):
+        if not self._files:
+            return None
+        chosen = self._files[self._pos]
+        self._pos = (self._pos + 1) % len(self._files)
+        return chosen
+
+
+def _choose_asset(list_assets, rng=random):
+    if isinstance(list_assets, AssetCycler):
+        return list_assets.next()
     if not list_assets:
         return None
-    return random.choice(list_assets)
-
-
-def build_effect_command_for(key, level, src_path, overlay_path=None, assets=None):
-    assets = assets or {}
-    if key == "random_sound":
-        # legacy: no external asset, just bump volume
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}copy[vout]",
-                f"{0}{0}" if False else "{0a}volume=1.0[aout]"  # keep placeholder style
-            ],
-        }
-
-    if key == "sounds":
-        # pick a sound from assets['sounds'] and mix into audio
-        chosen = _choose_asset(assets.get("sounds", []))
-        if not chosen:
-            # fallback to no-op
-            return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-        # effect will use one extra input {1} -> referenced as {1a}
-        # Mix main audio ({0a}) with chosen sound ({1a})
-        return {
-            "inputs": [chosen],
-            "filters": [
-                "{0v}copy[vout]",
-                "{0a}[maina]; {1a}[in1]; [maina][in1]amix=inputs=2:duration=first:dropout_transition=2[aout]"
-            ],
-        }
-
-    if key == "reverse":
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}reverse[vrev]",
-                "{0a}areverse[arev]",
-                "[vrev]setpts=PTS-STARTPTS[vout]",
-                "[arev]asetpts=PTS-STARTPTS[aout]"
-            ],
-        }
-
-    if key == "speed":
-        factor = max(0.125, min(4.0, level))
-        pts = f"{1.0/float(factor)}*PTS"
-        # Build atempo chain
-        tempos = []
-        target = factor
-        if target < 0.5:
-            t = target
-            while t < 0.5:
-                tempos.append(0.5)
-                t /= 0.5
-            tempos.append(round(t, 3))
-        else:
-            t = target
-            while t > 2.0:
-                tempos.append(2.0)
-                t /= 2.0
-            tempos.append(round(t, 3))
-        afilter = ",".join("atempo={}".format(x) for x in tempos)
-        return {
-            "inputs": [],
-            "filters": [
-                f"{{0v}}setpts={pts}[vout]",
-                f"{{0a}}{afilter}[aout]"
-            ]
-        }
-
-    if key == "chorus":
-        delay = int(20 + level * 60)
-        decay = max(0.1, min(0.9, 0.2 + level * 0.2))
-        aecho = f"aecho=0.8:0.9:{delay}|{delay*2}:{decay}|{decay*0.6}"
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}copy[vout]",
-                f"{{0a}}{aecho}[aout]"
-            ]
-        }
-
-    if key == "vibrato":
-        pitch = max(0.5, min(2.0, level))
-        asetrate = f"asetrate=44100*{pitch}"
-        atempo_factor = 1.0 / pitch
-        afilter = f"{asetrate},aresample=44100,atempo={max(0.5, min(2.0, atempo_factor))}"
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}copy[vout]",
-                f"{{0a}}{afilter}[aout]"
-            ]
-        }
-
-    if key == "stutter":
-        loop_count = max(2, int(level * 3))
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}trim=0:0.15,setpts=PTS-STARTPTS[vst]",
-                f"[vst]loop={loop_count}:1:0[vstl]",
-                "{0a}atrim=0:0.15,asetpts=PTS-STARTPTS[ast]",
-                f"[ast]aloop=loop={loop_count}:size=2[astl]",
-                "[vstl]scale=iw:ih[vout]",
-                "[astl]anull[aout]"
-            ]
-        }
-
-    if key == "earrape":
-        gain = max(2.0, min(30.0, level))
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}eq=contrast=1.1:saturation=1.4[vout]",
-                f"{{0a}}volume={gain}[aout]"
-            ]
-        }
-
-    if key == "autotune":
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}copy[vout]",
-                "{0a}anull[aout]"
-            ]
-        }
-
-    if key == "dance_squid":
-        zoom = 1.0 + 0.05 * level
-        return {
-            "inputs": [],
-            "filters": [
-                f"{{0v}}scale=iw*{zoom}:ih*{zoom},transpose=1,transpose=2,format=yuv420p[vout]",
-                "{0a}atempo=1.0[aout]"
-            ]
-        }
-
-    if key == "invert":
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}negate[vout]",
-                "{0a}anull[aout]"
-            ]
-        }
-
-    if key == "rainbow":
-        # use overlay_path if provided, otherwise try assets.images
-        if overlay_path and os.path.exists(overlay_path):
-            return {
-                "inputs": [overlay_path],
-                "filters": [
-                    "{0v}{1v}overlay=10:10:shortest=1[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        chosen = _choose_asset(assets.get("images", []))
-        if chosen:
-            return {
-                "inputs": [chosen],
-                "filters": [
-                    "{0v}{1v}overlay=10:10:shortest=1[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    if key == "mirror":
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}hflip[vout]",
-                "{0a}anull[aout]"
-            ]
-        }
-
-    if key == "sus":
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}copy[vout]",
-                "{0a}anull[aout]"
-            ]
-        }
-
-    if key == "explosion_spam":
-        chosen = _choose_asset(assets.get("images", [])) or overlay_path
-        if chosen:
-            return {
-                "inputs": [chosen],
-                "filters": [
-                    # place overlay briefly at t=0..0.6
-                    "{0v}{1v}overlay=enable='between(t,0,0.6)':x=10:y=10[vtmp]",
-                    "[vtmp]copy[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    if key == "frame_shuffle":
-        return {
-            "inputs": [],
-            "filters": [
-                "{0v}tblend=all_mode='addition',framestep=1[vout]",
-                "{0a}anull[aout]"
-            ]
-        }
-
-    if key == "meme_injection":
-        chosen_img = _choose_asset(assets.get("memes", [])) or overlay_path
-        chosen_snd = _choose_asset(assets.get("meme_sounds", []))
-        inputs = []
-        filters = []
-        if chosen_img:
-            inputs.append(chosen_img)
-            filters.append("{0v}{1v}overlay=W-w-10:H-h-10[vtmp]")
-        else:
-            filters.append("{0v}copy[vtmp]")
-        if chosen_snd:
-            inputs.append(chosen_snd)
-            # map vtmp to vout and mix audio
-            # note: if both image and sound selected the extra inputs count will be 1 or 2
-            # We'll produce a mixing command referencing {1a} or {2a} as appropriate in worker
-            filters.append("{0a}[maina]; {1a}[sfx]; [maina][sfx]amix=inputs=2:duration=first[aout]")
-            filters.append("[vtmp]copy[vout]")
-            return {"inputs": inputs, "filters": filters}
-        else:
-            filters.append("{0a}anull[aout]")
-            filters.append("[vtmp]copy[vout]")
-            return {"inputs": inputs, "filters": filters}
-
-    if key == "meme_sounds":
-        chosen = _choose_asset(assets.get("meme_sounds", []))
-        if not chosen:
-            return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-        return {
-            "inputs": [chosen],
-            "filters": [
-                "{0v}copy[vout]",
-                "{0a}[maina]; {1a}[sfx]; [maina][sfx]amix=inputs=2:duration=first[aout]"
-            ]
-        }
-
-    if key == "memes":
-        # memes often include both image and sound packaged; we try to choose image from memes and sound from meme_sounds
-        chosen_img = _choose_asset(assets.get("memes", []))
-        chosen_snd = _choose_asset(assets.get("meme_sounds", []))
-        inputs = []
-        filters = []
-        if chosen_img:
-            inputs.append(chosen_img)
-            filters.append("{0v}{1v}overlay=10:10:shortest=1[vtmp]")
-        else:
-            filters.append("{0v}copy[vtmp]")
-        if chosen_snd:
-            inputs.append(chosen_snd)
-            filters.append("{0a}[m]; {1a}[s]; [m][s]amix=inputs=2:duration=first[aout]")
-        else:
-            filters.append("{0a}anull[aout]")
-        filters.append("[vtmp]copy[vout]")
-        return {"inputs": inputs, "filters": filters}
-
-    if key == "sentence_mix":
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    if key == "adverts":
-        chosen = _choose_asset(assets.get("adverts", []))
-        if chosen:
-            # overlay ad video on top for a short period using one extra input
-            return {
-                "inputs": [chosen],
-                "filters": [
-                    "{0v}{1v}overlay=enable='between(t,0,3)':x=W-w-10:y=10[vtmp]",
-                    "[vtmp]copy[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    if key == "errors":
-        chosen = _choose_asset(assets.get("errors", []))
-        if chosen:
-            return {
-                "inputs": [chosen],
-                "filters": [
-                    # overlay glitch/error file in top-left at several short intervals
-                    "{0v}{1v}overlay=enable='gt(mod(t,0.8),0.0)':x=0:y=0[vtmp]",
-                    "[vtmp]copy[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    if key == "images":
-        chosen = _choose_asset(assets.get("images", []))
-        if chosen:
-            return {
-                "inputs": [chosen],
-                "filters": [
-                    # simple montage: overlay image fading in at 1s
-                    "{0v}{1v}overlay=enable='between(t,1,4)':x=main_w/4:y=main_h/4:alpha='if(lt(t,2),0,1)'[vtmp]",
-                    "[vtmp]copy[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    if key == "overlay_videos":
-        chosen = _choose_asset(assets.get("overlays_videos", []))
-        if chosen:
-            return {
-                "inputs": [chosen],
-                "filters": [
-                    "{0v}{1v}overlay=10:10:shortest=1[vtmp]",
-                    "[vtmp]copy[vout]",
-                    "{0a}anull[aout]"
-                ]
-            }
-        return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
-
-    # default fallback: passthrough
-    return {"inputs": [], "filters": ["{0v}copy[vout]", "{0a}anull[aout]"]}
\ No newline at end of file
+    return rng.choice(list_assets)
+
+
+def _b_random_sound(level, src_path, overlay_path, assets, rng):
+    # legacy: no external asset, just bump volume
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}copy[vout]",
+            "{0a}volume=1.0[aout]"
+        ],
+    }
+
+
+def _b_sounds(level, src_path, overlay_path, assets, rng):
+    # pick a sound from assets['sounds'] and mix into audio
+    chosen = _choose_asset(assets.get("sounds", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    # no filters of its own: the sound (local input 1) is mixed into the
+    # final audio by the worker's terminal amix node
+    return {
+        "inputs": [chosen],
+        "filters": [],
+        "mix_audio": [1],
+    }
+
+
+def _b_reverse(level, src_path, overlay_path, assets, rng):
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}reverse[vrev]",
+            "{0a}areverse[arev]",
+            "[vrev]setpts=PTS-STARTPTS[vout]",
+            "[arev]asetpts=PTS-STARTPTS[aout]"
+        ],
+    }
+
+
+def _b_speed(level, src_path, overlay_path, assets, rng):
+    factor = max(0.125, min(4.0, level))
+    pts = f"{1.0/float(factor)}*PTS"
+    # Build atempo chain
+    tempos = []
+    target = factor
+    if target < 0.5:
+        t = target
+        while t < 0.5:
+            tempos.append(0.5)
+            t /= 0.5
+        tempos.append(round(t, 3))
+    else:
+        t = target
+        while t > 2.0:
+            tempos.append(2.0)
+            t /= 2.0
+        tempos.append(round(t, 3))
+    afilter = ",".join("atempo={}".format(x) for x in tempos)
+    return {
+        "inputs": [],
+        "filters": [
+            f"{{0v}}setpts={pts}[vout]",
+            f"{{0a}}{afilter}[aout]"
+        ]
+    }
+
+
+def _b_chorus(level, src_path, overlay_path, assets, rng):
+    delay = int(20 + level * 60)
+    decay = max(0.1, min(0.9, 0.2 + level * 0.2))
+    aecho = f"aecho=0.8:0.9:{delay}|{delay*2}:{decay}|{decay*0.6}"
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}copy[vout]",
+            f"{{0a}}{aecho}[aout]"
+        ]
+    }
+
+
+def _b_vibrato(level, src_path, overlay_path, assets, rng):
+    pitch = max(0.5, min(2.0, level))
+    asetrate = f"asetrate=44100*{pitch}"
+    atempo_factor = 1.0 / pitch
+    afilter = f"{asetrate},aresample=44100,atempo={max(0.5, min(2.0, atempo_factor))}"
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}copy[vout]",
+            f"{{0a}}{afilter}[aout]"
+        ]
+    }
+
+
+def _b_stutter(level, src_path, overlay_path, assets, rng):
+    loop_count = max(2, int(level * 3))
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}trim=0:0.15,setpts=PTS-STARTPTS[vst]",
+            f"[vst]loop={loop_count}:1:0[vstl]",
+            "{0a}atrim=0:0.15,asetpts=PTS-STARTPTS[ast]",
+            f"[ast]aloop=loop={loop_count}:size=2[astl]",
+            "[vstl]scale=iw:ih[vout]",
+            "[astl]anull[aout]"
+        ]
+    }
+
+
+def _b_earrape(level, src_path, overlay_path, assets, rng):
+    gain = max(2.0, min(30.0, level))
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}eq=contrast=1.1:saturation=1.4[vout]",
+            f"{{0a}}volume={gain}[aout]"
+        ]
+    }
+
+
+def _b_dance_squid(level, src_path, overlay_path, assets, rng):
+    zoom = 1.0 + 0.05 * level
+    return {
+        "inputs": [],
+        "filters": [
+            f"{{0v}}scale=iw*{zoom}:ih*{zoom},transpose=1,transpose=2,format=yuv420p[vout]",
+            "{0a}atempo=1.0[aout]"
+        ]
+    }
+
+
+def _b_invert(level, src_path, overlay_path, assets, rng):
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}negate[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_rainbow(level, src_path, overlay_path, assets, rng):
+    # use overlay_path if provided, otherwise try assets.images
+    if overlay_path and os.path.exists(overlay_path):
+        chosen = overlay_path
+    else:
+        chosen = _choose_asset(assets.get("images", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    return {
+        "inputs": [chosen],
+        "filters": [
+            "{0v}{1v}overlay=10:10:shortest=1[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_mirror(level, src_path, overlay_path, assets, rng):
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}hflip[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_explosion_spam(level, src_path, overlay_path, assets, rng):
+    chosen = _choose_asset(assets.get("images", []), rng) or overlay_path
+    if not chosen:
+        return _PASSTHROUGH
+    return {
+        "inputs": [chosen],
+        "filters": [
+            # place overlay briefly at t=0..0.6
+            "{0v}{1v}overlay=enable='between(t,0,0.6)':x=10:y=10[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_frame_shuffle(level, src_path, overlay_path, assets, rng):
+    return {
+        "inputs": [],
+        "filters": [
+            "{0v}tblend=all_mode='addition',framestep=1[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_meme_injection(level, src_path, overlay_path, assets, rng):
+    chosen_img = _choose_asset(assets.get("memes", []), rng) or overlay_path
+    chosen_snd = _choose_asset(assets.get("meme_sounds", []), rng)
+    inputs = []
+    filters = []
+    mix_audio = []
+    if chosen_img:
+        inputs.append(chosen_img)
+        filters.append("{0v}{1v}overlay=W-w-10:H-h-10[vout]")
+    if chosen_snd:
+        # the sound may be local input 1 or 2 depending on whether an
+        # image was selected; the worker mixes it into the final audio
+        inputs.append(chosen_snd)
+        mix_audio.append(len(inputs))
+    return {"inputs": inputs, "filters": filters, "mix_audio": mix_audio}
+
+
+def _b_meme_sounds(level, src_path, overlay_path, assets, rng):
+    chosen = _choose_asset(assets.get("meme_sounds", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    return {
+        "inputs": [chosen],
+        "filters": [],
+        "mix_audio": [1],
+    }
+
+
+def _b_memes(level, src_path, overlay_path, assets, rng):
+    # memes often include both image and sound packaged; we try to choose image from memes and sound from meme_sounds
+    chosen_img = _choose_asset(assets.get("memes", []), rng)
+    chosen_snd = _choose_asset(assets.get("meme_sounds", []), rng)
+    inputs = []
+    filters = []
+    mix_audio = []
+    if chosen_img:
+        inputs.append(chosen_img)
+        filters.append("{0v}{1v}overlay=10:10:shortest=1[vout]")
+    if chosen_snd:
+        inputs.append(chosen_snd)
+        mix_audio.append(len(inputs))
+    return {"inputs": inputs, "filters": filters, "mix_audio": mix_audio}
+
+
+def _b_adverts(level, src_path, overlay_path, assets, rng):
+    chosen = _choose_asset(assets.get("adverts", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    # overlay ad video on top for a short period using one extra input
+    return {
+        "inputs": [chosen],
+        "filters": [
+            "{0v}{1v}overlay=enable='between(t,0,3)':x=W-w-10:y=10[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_errors(level, src_path, overlay_path, assets, rng):
+    chosen = _choose_asset(assets.get("errors", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    return {
+        "inputs": [chosen],
+        "filters": [
+            # overlay glitch/error file in top-left at several short intervals
+            "{0v}{1v}overlay=enable='gt(mod(t,0.8),0.0)':x=0:y=0[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_images(level, src_path, overlay_path, assets, rng):
+    chosen = _choose_asset(assets.get("images", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    return {
+        "inputs": [chosen],
+        "filters": [
+            # simple montage: overlay image fading in at 1s
+            "{0v}{1v}overlay=enable='between(t,1,4)':x=main_w/4:y=main_h/4:alpha='if(lt(t,2),0,1)'[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_overlay_videos(level, src_path, overlay_path, assets, rng):
+    chosen = _choose_asset(assets.get("overlays_videos", []), rng)
+    if not chosen:
+        return _PASSTHROUGH
+    return {
+        "inputs": [chosen],
+        "filters": [
+            "{0v}{1v}overlay=10:10:shortest=1[vout]",
+            "{0a}anull[aout]"
+        ]
+    }
+
+
+def _b_passthrough(level, src_path, overlay_path, assets, rng):
+    # placeholder effects (autotune, sus, sentence_mix) are no-ops for now
+    return _PASSTHROUGH
+
+
+_EFFECT_BUILDERS = {
+    "random_sound": _b_random_sound,
+    "sounds": _b_sounds,
+    "reverse": _b_reverse,
+    "speed": _b_speed,
+    "chorus": _b_chorus,
+    "vibrato": _b_vibrato,
+    "stutter": _b_stutter,
+    "earrape": _b_earrape,
+    "autotune": _b_passthrough,
+    "dance_squid": _b_dance_squid,
+    "invert": _b_invert,
+    "rainbow": _b_rainbow,
+    "mirror": _b_mirror,
+    "sus": _b_passthrough,
+    "explosion_spam": _b_explosion_spam,
+    "frame_shuffle": _b_frame_shuffle,
+    "meme_injection": _b_meme_injection,
+    "meme_sounds": _b_meme_sounds,
+    "memes": _b_memes,
+    "sentence_mix": _b_passthrough,
+    "adverts": _b_adverts,
+    "errors": _b_errors,
+    "images": _b_images,
+    "overlay_videos": _b_overlay_videos,
+}
+
+
+def build_effect_command_for(key, level, src_path, overlay_path=None, assets=None, rng=random):
+    builder = _EFFECT_BUILDERS.get(key)
+    if builder is None:
+        # unknown key: passthrough
+        return _PASSTHROUGH
+    return builder(level, src_path, overlay_path, assets or {}, rng)
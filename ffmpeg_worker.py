@@ -12,73 +12,315 @@ placeholders to the correct global input indexes when assembling filter_complex.
 """
 
 import os
+import re
 import tempfile
 import subprocess
 import random
-from effects import EFFECTS_METADATA, build_effect_command_for
-from utils import run_subprocess
+import threading
+import concurrent.futures
+from effects import EFFECTS_METADATA, build_effect_command_for, AssetCycler
+from utils import run_subprocess, find_executable
+
+# Matches both token kinds rewritten per fragment in one scan: effect
+# placeholders like {0v}/{1a} (local input index + stream type) and named pad
+# labels like [vout] or [maina] emitted by effect builders. Stream specifiers
+# such as [0:v] start with a digit and are not matched.
+_TOKEN_RE = re.compile(r"\{(\d+)([va])\}|\[([A-Za-z]\w*)\]")
+
+# Canonical effect ordering, used to sort the enabled subset so graphs stay
+# deterministic without looping over every known effect.
+_EFFECT_ORDER = {k: i for i, k in enumerate(EFFECTS_METADATA)}
 
 
 class FFmpegWorker:
     def __init__(self, ffmpeg_bin="ffmpeg", ffplay_bin="ffplay"):
-        self.ffmpeg = ffmpeg_bin
-        self.ffplay = ffplay_bin
+        # Resolve each binary once via the cached PATH lookup; if it is not
+        # on PATH keep the bare name so run_subprocess reports the usual
+        # "not found" error at run time instead of breaking GUI startup.
+        self.ffmpeg = find_executable(ffmpeg_bin) or ffmpeg_bin
+        self.ffplay = find_executable(ffplay_bin) or ffplay_bin
+        # (src, overlay, effects key, assets key) -> (extra_inputs, filter_complex)
+        self._assemble_cache = {}
+        # (cache key, duration) -> preview path, so re-previewing an
+        # unchanged config skips the ffmpeg spawn and encode entirely.
+        self._preview_cache = {}
+        self._h264_enc = self._detect_h264_encoder()
+        # Asset paths already stat-checked once; re-previewing skips them.
+        self._verified_paths = set()
+        # Pool for the async API. Each ffmpeg is already multithreaded, so
+        # the semaphore caps how many run at once; extra submissions queue.
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1))
+        self._ffmpeg_slots = threading.Semaphore(self.MAX_CONCURRENT_FFMPEG)
+        # Live ffmpeg children, so close() can terminate in-flight renders;
+        # pool threads are non-daemon and would otherwise keep the process
+        # alive until ffmpeg finishes.
+        self._procs = set()
+        self._procs_lock = threading.Lock()
+        self._closed = False
+
+    # Small on purpose: parallel renders should not each grab every core.
+    MAX_CONCURRENT_FFMPEG = 2
+
+    # Probed in preference order; all fall back to libx264 when absent.
+    _HW_H264_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_videotoolbox")
+
+    def _detect_h264_encoder(self):
+        """
+        Probe ffmpeg once for a hardware H.264 encoder. Encoding dominates
+        render time, so NVENC/QSV/VideoToolbox is preferred when the build
+        ships one; any probe failure just means libx264.
+        """
+        try:
+            out = subprocess.run(
+                [self.ffmpeg, "-hide_banner", "-encoders"],
+                capture_output=True, text=True, timeout=10,
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return "libx264"
+        for enc in self._HW_H264_ENCODERS:
+            if enc in out:
+                return enc
+        return "libx264"
+
+    def _video_codec_args(self, preview=False):
+        """
+        Encoder selection plus matching rate-control flags. CRF only applies
+        to libx264; the hardware encoders use their constant-quality knobs.
+        """
+        if self._h264_enc == "h264_nvenc":
+            return ["-c:v", "h264_nvenc", "-preset", "p4", "-cq", "28" if preview else "22"]
+        if self._h264_enc == "h264_qsv":
+            return ["-c:v", "h264_qsv", "-global_quality", "28" if preview else "22"]
+        if self._h264_enc == "h264_videotoolbox":
+            return ["-c:v", "h264_videotoolbox", "-q:v", "50" if preview else "65"]
+        if preview:
+            return ["-c:v", "libx264", "-preset", "veryfast", "-crf", "28"]
+        return ["-c:v", "libx264", "-preset", "fast", "-crf", "20"]
+
+    def _hwaccel_args(self):
+        # Offload decode too when a hardware encoder was found, so frames
+        # stay off the CPU where possible. Must precede the -i it applies to.
+        if self._h264_enc != "libx264":
+            return ["-hwaccel", "auto"]
+        return []
+
+    def _verify_files_exist(self, src, extra_inputs):
+        """
+        Fail fast with a readable error instead of an ffmpeg stack of noise
+        when an input is missing. The source is user-supplied and may have
+        been deleted since it was chosen, so it is always checked; extra
+        inputs come from gather_assets (already stat-checked during the
+        scan), so each is verified at most once per worker.
+        """
+        if not src or not os.path.exists(src):
+            raise RuntimeError(f"Source file not found: {src}")
+        for p in extra_inputs:
+            if p in self._verified_paths:
+                continue
+            if not os.path.exists(p):
+                raise RuntimeError(f"Asset file not found: {p}")
+            self._verified_paths.add(p)
+
+    @staticmethod
+    def _cache_key(src_path, overlay_path, chosen_effects, assets):
+        """
+        Hashable fingerprint of everything _assemble_filter_complex depends on.
+        Clicking Preview then Generate with untouched settings hits the cache
+        instead of rebuilding (and re-randomizing) the whole graph.
+        """
+        effects_key = tuple(
+            (k, bool(cfg.get("enabled")), float(cfg.get("probability", 1.0)), float(cfg.get("level", 0.0)))
+            for k, cfg in sorted(chosen_effects.items())
+            if cfg
+        )
+        assets_key = tuple((k, tuple(v)) for k, v in sorted(assets.items()))
+        return (src_path, overlay_path, effects_key, assets_key)
+
+    def _assemble_cached(self, src_path, overlay_path, chosen_effects, assets):
+        key = self._cache_key(src_path, overlay_path, chosen_effects, assets)
+        cached = self._assemble_cache.get(key)
+        if cached is not None:
+            return cached
+        # A local RNG seeded from the fingerprint keeps probability gates and
+        # asset picks a pure function of the config (so the cached graph is
+        # exactly what a rebuild would have produced) without touching the
+        # lock-protected global random state, so concurrent workers don't
+        # serialize or perturb each other.
+        rng = random.Random(hash(key))
+        result = self._assemble_filter_complex(src_path, overlay_path, chosen_effects, assets, rng)
+        if len(self._assemble_cache) >= 32:
+            self._assemble_cache.clear()
+        self._assemble_cache[key] = result
+        return result
 
-    def _assemble_filter_complex(self, src_path, overlay_path, chosen_effects, assets):
+    def _assemble_filter_complex(self, src_path, overlay_path, chosen_effects, assets, rng=None,
+                                 main_index=0, extra_start=None, out_suffix=""):
         """
         Build a filter_complex string and additional inputs list based on chosen_effects.
         Effects should use placeholders {0v},{0a} for main input and {1v},{1a} ... for their extra inputs.
         Returns: (extra_inputs_list, filter_complex)
+
+        main_index/extra_start/out_suffix support batch mode, where several
+        sub-graphs share one ffmpeg invocation: the main source is input
+        main_index, extra inputs number from extra_start, and all labels
+        (including the final [vout{suffix}]/[aout{suffix}]) carry the suffix
+        so sub-graphs don't collide.
         """
+        if rng is None:
+            rng = random.Random()
+        if extra_start is None:
+            extra_start = main_index + 1
+        # Shuffle each asset category once and hand builders round-robin
+        # pools, so draws are O(1) and cover the library evenly instead of
+        # re-sampling the full list per pick.
+        assets = {k: AssetCycler(v, rng) for k, v in assets.items()}
         extra_inputs = []  # global list of extra input file paths
         filters = []
-        global_input_offset = 1  # next global index for extra inputs (0 reserved for main source)
+        global_input_offset = extra_start  # next global index for extra inputs
+        seen_inputs = {}  # realpath -> global index, so a file picked by two effects is opened once
+        mix_indices = []  # global input indices feeding the terminal amix
+        # Current ends of the video/audio chains; each effect consumes these
+        # and produces the next pair, so effects stack instead of all tapping
+        # the raw source (and no per-effect copy bridge is needed).
+        cur_v = f"[{main_index}:v]"
+        cur_a = f"[{main_index}:a]"
+        stage = 0
 
-        # For deterministic ordering, iterate in EFFECTS_METADATA order
-        for key in EFFECTS_METADATA.keys():
-            cfg = chosen_effects.get(key, {})
-            if not cfg or not cfg.get("enabled"):
+        # Filter down to the enabled subset first (typically a handful of the
+        # 24 known effects), then sort it back into EFFECTS_METADATA order so
+        # graphs stay deterministic.
+        enabled = [(key, cfg) for key, cfg in chosen_effects.items() if cfg and cfg.get("enabled")]
+        enabled.sort(key=lambda kv: _EFFECT_ORDER.get(kv[0], len(_EFFECT_ORDER)))
+        for key, cfg in enabled:
+            # probability check; the p == 0/1 endpoints (the defaults) are
+            # decided without burning an RNG draw
+            p = cfg.get("probability", 1.0)
+            if p <= 0.0:
                 continue
-            # probability check
-            p = float(cfg.get("probability", 1.0))
-            if p < 1.0 and random.random() > p:
+            if p < 1.0 and rng.random() > p:
                 continue
             level = float(cfg.get("level", EFFECTS_METADATA[key].get("default_level", 1.0)))
 
-            cmd = build_effect_command_for(key, level, src_path, overlay_path, assets)
+            cmd = build_effect_command_for(key, level, src_path, overlay_path, assets, rng)
             if not cmd:
                 continue
-            # cmd: { "inputs": [...], "filters": [...], "label": "vout" }
-            # Record current offset for this effect
-            this_effect_start_index = global_input_offset
-            # append its inputs to global list and increment offset
+            # cmd: { "inputs": [...], "filters": [...] }
+            # Resolve this effect's inputs to global indices, re-using the
+            # index of any file already appended (ffmpeg would otherwise
+            # open and decode the same asset once per referencing effect).
+            local_globals = []
             for inp in cmd.get("inputs", []):
-                extra_inputs.append(inp)
-                global_input_offset += 1
-            # Replace placeholders in filters: {0v}->{0:v}, {1v}->{N:v} etc.
-            for fragment in cmd.get("filters", []):
-                frag = fragment
-                # find placeholders like {0v}, {1a}
-                # replace {0v} with [0:v], {0a} with [0:a]
-                frag = frag.replace("{0v}", "[0:v]").replace("{0a}", "[0:a]")
-                # for each local extra input index j, replace {jv}/{ja}
-                num_local_inputs = len(cmd.get("inputs", []))
-                for j in range(1, num_local_inputs + 1):
-                    global_idx = this_effect_start_index + (j - 1)
-                    frag = frag.replace("{" + str(j) + "v}", f"[{global_idx}:v]")
-                    frag = frag.replace("{" + str(j) + "a}", f"[{global_idx}:a]")
-                filters.append(frag)
+                real = os.path.realpath(inp)
+                idx = seen_inputs.get(real)
+                if idx is None:
+                    idx = global_input_offset
+                    seen_inputs[real] = idx
+                    extra_inputs.append(inp)
+                    global_input_offset += 1
+                local_globals.append(idx)
+            # Sound-mixing effects declare which of their inputs join the
+            # final audio mix instead of emitting their own amix pair; one
+            # terminal N-way amix replaces the chain of 2-way mixes (each a
+            # separate node with its own resampler and level normalization).
+            for j in cmd.get("mix_audio", []):
+                mix_indices.append(local_globals[j - 1])
+            # Rewrite each fragment in a single scan. Placeholders: local
+            # index 0 is the current chain end, local j is the (j-1)th extra
+            # input this effect appended. Named labels are namespaced by
+            # stage so the same builder can appear twice in one graph:
+            # [vout]/[aout] become this stage's chain ends, internal labels
+            # get a stage suffix.
+            def repl(m, idxs=local_globals, v=cur_v, a=cur_a, i=f"{stage}{out_suffix}"):
+                if m.group(1) is not None:  # {jv}/{ja} placeholder
+                    j = int(m.group(1))
+                    if j == 0:
+                        return v if m.group(2) == "v" else a
+                    return f"[{idxs[j - 1]}:{m.group(2)}]"
+                name = m.group(3)  # [label]
+                if name == "vout":
+                    return f"[v{i}]"
+                if name == "aout":
+                    return f"[a{i}]"
+                return f"[{name}_{i}]"
+
+            fragments = cmd.get("filters", [])
+            for fragment in fragments:
+                filters.append(_TOKEN_RE.sub(repl, fragment))
+            # Mixing-only effects emit no fragments; the chain ends only
+            # advance past stages that actually produced a new pad.
+            if any("[vout]" in f for f in fragments):
+                cur_v = f"[v{stage}{out_suffix}]"
+            if any("[aout]" in f for f in fragments):
+                cur_a = f"[a{stage}{out_suffix}]"
+            stage += 1
+
+        src_v = f"[{main_index}:v]"
+        src_a = f"[{main_index}:a]"
+        if mix_indices:
+            # One terminal mix of the processed chain audio plus every
+            # declared sound input; normalize=0 keeps levels as authored
+            # instead of each 2-way mix halving them.
+            pads = cur_a + "".join(f"[{idx}:a]" for idx in mix_indices)
+            filters.append(
+                f"{pads}amix=inputs={len(mix_indices) + 1}:duration=first:normalize=0[aout{out_suffix}]"
+            )
+            cur_a = None  # consumed by the amix node, which wrote the output label
         # Ensure there's at least a passthrough if no filters
         if not filters:
-            filters = ["[0:v]copy[vout]", "[0:a]anull[aout]"]
-        # Guarantee that some filters produce [vout] and [aout]; if not present, try to append mapping
+            filters = [f"{cur_v}copy[vout{out_suffix}]", f"{cur_a}anull[aout{out_suffix}]"]
+            return extra_inputs, "; ".join(filters)
+        # The chain ends are the graph outputs: untouched chains get an
+        # explicit passthrough node, processed ones are renamed in place.
+        if cur_v == src_v:
+            filters.append(f"{cur_v}copy[vout{out_suffix}]")
+            cur_v = None
+        if cur_a == src_a:
+            filters.append(f"{cur_a}anull[aout{out_suffix}]")
+            cur_a = None
         fc = "; ".join(filters)
+        if cur_v is not None:
+            fc = fc.replace(cur_v, f"[vout{out_suffix}]")
+        if cur_a is not None:
+            fc = fc.replace(cur_a, f"[aout{out_suffix}]")
         return extra_inputs, fc
 
+    # Above this size the graph goes into a script file instead of argv, so
+    # huge effect stacks cannot hit the OS argument-length limit (ARG_MAX).
+    _FILTER_SCRIPT_THRESHOLD = 4096
+
+    @staticmethod
+    def _thread_args(cfg):
+        """
+        Threading flags for codec and filter-graph execution. ffmpeg's
+        filter_complex defaults to a single thread, so overlay/mix-heavy
+        graphs leave most cores idle without these. cfg["threads"] overrides
+        the autodetected core count.
+        """
+        n = str(int(cfg.get("threads") or os.cpu_count() or 4))
+        return ["-threads", n, "-filter_threads", n, "-filter_complex_threads", n]
+
+    def _filter_complex_args(self, filter_complex, tmpdir):
+        """
+        Return the command-line args carrying the filter graph: inline via
+        -filter_complex for small graphs, via -filter_complex_script for
+        large ones. The script file lives in the per-run tmpdir and is
+        cleaned up with it.
+        """
+        if len(filter_complex) <= self._FILTER_SCRIPT_THRESHOLD:
+            return ["-filter_complex", filter_complex]
+        script_path = os.path.join(tmpdir, "graph.txt")
+        with open(script_path, "w") as f:
+            f.write(filter_complex)
+        return ["-filter_complex_script", script_path]
+
     def generate_preview(self, cfg, log_fn=print):
         """
         Create a short preview using preview duration and chosen effects.
         Writes to temp file and returns path to preview file.
+
+        With cfg["live_preview"] set, the encode is streamed straight into
+        ffplay over a pipe instead (see preview_live).
         """
         src = cfg["src"]
         overlay = cfg.get("overlay")
@@ -86,22 +328,87 @@ class FFmpegWorker:
         chosen = cfg["effects"]
         assets = cfg.get("assets", {})
 
+        if cfg.get("live_preview"):
+            return self.preview_live(cfg, log_fn)
+
+        # Spawning ffmpeg re-parses inputs and re-initialises the codecs on
+        # every call, which dominates preview latency. Graphs are
+        # deterministic per config (see _assemble_cached), so an unchanged
+        # config re-uses the previously rendered preview file.
+        preview_key = (self._cache_key(src, overlay, chosen, assets), duration)
+        cached_preview = self._preview_cache.get(preview_key)
+        if cached_preview and os.path.exists(cached_preview):
+            log_fn("Preview unchanged, reusing:", cached_preview)
+            return cached_preview
+
         tmpdir = tempfile.mkdtemp(prefix="ytp_preview_")
         out_path = os.path.join(tmpdir, "preview.mp4")
-        extra_inputs, filter_complex = self._assemble_filter_complex(src, overlay, chosen, assets)
+        cmd = self._preview_cmd(cfg, tmpdir)
+        cmd.extend([*self._video_codec_args(preview=True), "-c:a", "aac", "-shortest", out_path])
+
+        log_fn("Preview FFmpeg command:", " ".join(cmd))
+        self._run_ffmpeg(cmd, log_fn)
+        if len(self._preview_cache) >= 16:
+            self._preview_cache.clear()
+        self._preview_cache[preview_key] = out_path
+        return out_path
+
+    def _preview_cmd(self, cfg, tmpdir):
+        """
+        Shared front half of the preview command: inputs, duration clamp and
+        filter graph. Callers append the codec/output args.
+        """
+        src = cfg["src"]
+        overlay = cfg.get("overlay")
+        duration = int(cfg.get("preview_duration", 8))
+        chosen = cfg["effects"]
+        assets = cfg.get("assets", {})
+
+        extra_inputs, filter_complex = self._assemble_cached(src, overlay, chosen, assets)
+        self._verify_files_exist(src, extra_inputs)
 
-        cmd = [self.ffmpeg, "-y", "-ss", "0", "-t", str(duration), "-i", src]
+        cmd = [self.ffmpeg, "-y", *self._thread_args(cfg), *self._hwaccel_args(), "-ss", "0", "-t", str(duration), "-i", src]
         for inp in extra_inputs:
             cmd.extend(["-i", inp])
         if filter_complex:
-            cmd.extend(["-filter_complex", filter_complex])
+            cmd.extend(self._filter_complex_args(filter_complex, tmpdir))
             # attempt to map outputs if filters produced named outputs
             cmd.extend(["-map", "[vout]", "-map", "[aout]"])
-        cmd.extend(["-c:v", "libx264", "-preset", "veryfast", "-crf", "28", "-c:a", "aac", "-shortest", out_path])
+        return cmd
 
-        log_fn("Preview FFmpeg command:", " ".join(cmd))
-        run_subprocess(cmd, log_fn)
-        return out_path
+    def preview_live(self, cfg, log_fn=print):
+        """
+        Stream the preview into ffplay over a pipe instead of encoding to a
+        temp mp4 that ffplay then re-reads: playback starts as soon as the
+        first frames are encoded and nothing touches disk. NUT carries the
+        H.264+PCM streams and is seekless, so it suits a pipe. Returns the
+        (ffmpeg, ffplay) Popen handles; the caller may wait on or kill them.
+        """
+        tmpdir = tempfile.mkdtemp(prefix="ytp_preview_")
+        cmd = self._preview_cmd(cfg, tmpdir)
+        cmd.extend([*self._video_codec_args(preview=True), "-c:a", "pcm_s16le",
+                    "-f", "nut", "pipe:1"])
+
+        log_fn("Live preview FFmpeg command:", " ".join(cmd))
+        ffmpeg_proc = None
+        try:
+            ffmpeg_proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+            ffplay_proc = subprocess.Popen(
+                [self.ffplay, "-autoexit", "-window_title", "YTP Preview", "-"],
+                stdin=ffmpeg_proc.stdout,
+            )
+        except FileNotFoundError as e:
+            # ffplay may be missing with ffmpeg present; without a reader the
+            # already-started ffmpeg would block forever once the pipe buffer
+            # fills, leaking a stuck process per attempt.
+            if ffmpeg_proc is not None:
+                ffmpeg_proc.stdout.close()
+                ffmpeg_proc.kill()
+                ffmpeg_proc.wait()
+            raise RuntimeError("FFmpeg/ffplay binary not found. Ensure both are installed and on PATH.") from e
+        # Let ffmpeg receive SIGPIPE and stop if the ffplay window is closed.
+        ffmpeg_proc.stdout.close()
+        return ffmpeg_proc, ffplay_proc
 
     def generate(self, cfg, out_path, log_fn=print):
         src = cfg["src"]
@@ -110,17 +417,128 @@ class FFmpegWorker:
         assets = cfg.get("assets", {})
 
         tmpdir = tempfile.mkdtemp(prefix="ytp_build_")
-        extra_inputs, filter_complex = self._assemble_filter_complex(src, overlay, chosen, assets)
+        extra_inputs, filter_complex = self._assemble_cached(src, overlay, chosen, assets)
+        self._verify_files_exist(src, extra_inputs)
 
-        cmd = [self.ffmpeg, "-y", "-i", src]
+        cmd = [self.ffmpeg, "-y", *self._thread_args(cfg), *self._hwaccel_args(), "-i", src]
         for inp in extra_inputs:
             cmd.extend(["-i", inp])
         if filter_complex:
-            cmd.extend(["-filter_complex", filter_complex])
+            cmd.extend(self._filter_complex_args(filter_complex, tmpdir))
             # try to map vout/aout produced by filters
             cmd.extend(["-map", "[vout]", "-map", "[aout]"])
-        cmd.extend(["-c:v", "libx264", "-preset", "fast", "-crf", "20", "-c:a", "aac", "-b:a", "192k", out_path])
+        cmd.extend([*self._video_codec_args(), "-c:a", "aac", "-b:a", "192k", out_path])
 
         log_fn("FFmpeg command:", " ".join(cmd))
-        run_subprocess(cmd, log_fn)
-        return out_path
\ No newline at end of file
+        self._run_ffmpeg(cmd, log_fn)
+        return out_path
+
+    def generate_batch(self, cfgs, out_paths, log_fn=print):
+        """
+        Render several source clips with a single ffmpeg invocation.
+
+        All sources become inputs of one command and each cfg's sub-graph is
+        assembled with suffixed labels ([vout_0], [vout_1], ...), so process
+        spawn and codec init are paid once instead of per clip - a large
+        fraction of runtime on the short clips typical here. Each cfg keeps
+        its own effects/assets; outputs are written in order to out_paths.
+        """
+        if len(cfgs) != len(out_paths):
+            raise ValueError("cfgs and out_paths must have the same length")
+        if not cfgs:
+            return []
+
+        tmpdir = tempfile.mkdtemp(prefix="ytp_batch_")
+        n = len(cfgs)
+        all_extras = []
+        graphs = []
+        for i, cfg in enumerate(cfgs):
+            src = cfg["src"]
+            overlay = cfg.get("overlay")
+            chosen = cfg["effects"]
+            assets = cfg.get("assets", {})
+            rng = random.Random(hash(self._cache_key(src, overlay, chosen, assets)))
+            extra_inputs, fc = self._assemble_filter_complex(
+                src, overlay, chosen, assets, rng,
+                main_index=i, extra_start=n + len(all_extras), out_suffix=f"_{i}",
+            )
+            self._verify_files_exist(src, extra_inputs)
+            all_extras.extend(extra_inputs)
+            graphs.append(fc)
+
+        cmd = [self.ffmpeg, "-y", *self._thread_args(cfgs[0]), *self._hwaccel_args()]
+        for cfg in cfgs:
+            cmd.extend(["-i", cfg["src"]])
+        for inp in all_extras:
+            cmd.extend(["-i", inp])
+        cmd.extend(self._filter_complex_args("; ".join(graphs), tmpdir))
+        for i, out_path in enumerate(out_paths):
+            cmd.extend(["-map", f"[vout_{i}]", "-map", f"[aout_{i}]",
+                        *self._video_codec_args(), "-c:a", "aac", "-b:a", "192k", out_path])
+
+        log_fn("Batch FFmpeg command:", " ".join(cmd))
+        self._run_ffmpeg(cmd, log_fn)
+        return list(out_paths)
+
+    def _run_ffmpeg(self, cmd, log_fn):
+        """
+        run_subprocess with the child registered in self._procs for its
+        lifetime, so close() can terminate it.
+        """
+        started = []
+
+        def on_start(proc):
+            started.append(proc)
+            with self._procs_lock:
+                self._procs.add(proc)
+
+        try:
+            run_subprocess(cmd, log_fn, on_start)
+        finally:
+            if started:
+                with self._procs_lock:
+                    self._procs.discard(started[0])
+
+    def _run_limited(self, fn, *args):
+        # Acquired inside the worker thread so queued jobs wait their turn.
+        if self._closed:
+            raise RuntimeError("Worker is closed")
+        with self._ffmpeg_slots:
+            return fn(*args)
+
+    def close(self):
+        """
+        Stop accepting work and terminate any in-flight ffmpeg children.
+        Called on GUI shutdown: pool threads are joined at interpreter exit,
+        so without killing the children a long render would keep the process
+        alive for minutes after the window closed.
+        """
+        self._closed = True
+        try:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        except TypeError:  # cancel_futures needs Python 3.9+
+            self._pool.shutdown(wait=False)
+        with self._procs_lock:
+            procs = list(self._procs)
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+        for proc in procs:
+            try:
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+
+    def generate_preview_async(self, cfg, log_fn=print):
+        """
+        Submit generate_preview to the worker pool and return a Future, so
+        the GUI thread stays responsive and independent previews can render
+        in parallel (bounded by MAX_CONCURRENT_FFMPEG).
+        """
+        return self._pool.submit(self._run_limited, self.generate_preview, cfg, log_fn)
+
+    def generate_async(self, cfg, out_path, log_fn=print):
+        """
+        Submit generate to the worker pool and return a Future.
+        """
+        return self._pool.submit(self._run_limited, self.generate, cfg, out_path, log_fn)
\ No newline at end of file
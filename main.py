@@ -8,7 +8,6 @@ Compatible with Python 3.6+ and Windows 8.1 (use system-installed ffmpeg).
 """
 
 import os
-import threading
 import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -229,12 +228,13 @@ class App(tk.Tk):
         if not cfg["src"]:
             messagebox.showwarning("No source", "Please select a source video first.")
             return
-        threading.Thread(target=self._run_preview_thread, args=(cfg,), daemon=True).start()
-
-    def _run_preview_thread(self, cfg):
         self.log("Starting preview...")
+        future = self.worker.generate_preview_async(cfg, self.log)
+        future.add_done_callback(self._on_preview_done)
+
+    def _on_preview_done(self, future):
         try:
-            out_path = self.worker.generate_preview(cfg, self.log)
+            out_path = future.result()
             if out_path:
                 self.log("Preview ready:", out_path)
                 open_with_default_app(out_path)  # open with default app or ffplay
@@ -250,12 +250,13 @@ class App(tk.Tk):
         base = os.path.splitext(os.path.basename(cfg["src"]))[0]
         out_name = f"{base}_ytp_{int(time.time())}.mp4"
         out_path = os.path.join(cfg["output_dir"], out_name)
-        threading.Thread(target=self._run_generate_thread, args=(cfg, out_path), daemon=True).start()
-
-    def _run_generate_thread(self, cfg, out_path):
         self.log("Starting generation:", out_path)
+        future = self.worker.generate_async(cfg, out_path, self.log)
+        future.add_done_callback(self._on_generate_done)
+
+    def _on_generate_done(self, future):
         try:
-            self.worker.generate(cfg, out_path, self.log)
+            out_path = future.result()
             self.log("Generation finished:", out_path)
             messagebox.showinfo("Done", f"Generated: {out_path}")
         except Exception as e:
@@ -263,6 +264,9 @@ class App(tk.Tk):
             messagebox.showerror("Error", f"Generation failed: {e}")
 
     def on_close(self):
+        # Kill in-flight renders; the worker pool's threads are non-daemon
+        # and would otherwise keep the process alive until ffmpeg finishes.
+        self.worker.close()
         self.destroy()
 
 
@@ -2,20 +2,35 @@
 utils.py - helper utilities for running subprocesses, file dialogs, and opening files.
 """
 
+import functools
+import shutil
 import subprocess
 import os
 import sys
 
-def run_subprocess(cmd, log_fn=print):
+@functools.lru_cache(maxsize=32)
+def find_executable(name):
+    """
+    Resolve an executable name to its full path via PATH, or None if absent.
+    Cached: a PATH walk stats every candidate directory, and the same
+    binaries (ffmpeg/ffplay) are looked up for every worker instance.
+    """
+    return shutil.which(name)
+
+def run_subprocess(cmd, log_fn=print, on_start=None):
     """
     Run a subprocess command while streaming stdout/stderr to log_fn.
-    Compatible with Windows. cmd must be a list.
+    Compatible with Windows. cmd must be a list. on_start, if given, is
+    called with the Popen handle right after spawn so the caller can track
+    (and later terminate) the child.
     """
     log_fn("Running:", " ".join(cmd))
     try:
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
     except FileNotFoundError as e:
         raise RuntimeError("FFmpeg binary not found. Ensure ffmpeg is installed and on PATH.") from e
+    if on_start is not None:
+        on_start(process)
 
     for line in iter(process.stdout.readline, ""):
         if line: